@@ -1,27 +1,72 @@
 from dotenv import load_dotenv
 import os
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import List
-import math
+from pydantic import BaseModel, Field
+from typing import List, Tuple
+from contextlib import asynccontextmanager
+import numpy as np
+import json
+import queue
+import atexit
+import random
+import asyncio
 import logging
-from services.ai_analyst import generate_situation_report
+from logging.handlers import QueueHandler, QueueListener
+import httpx
+from cachetools import TTLCache
+from services.ai_analyst import (
+    close_client,
+    generate_situation_report,
+    stream_situation_report,
+    start_batcher,
+    stop_batcher,
+)
 from services.mission import generate_flight_path
 
 # Import services
 from services.sentinel import fetch_satellite_image
-from services.drift import predict_drift, get_wind_data
+from services.drift import predict_drift, predict_drift_batch, get_wind_data
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+# Records go through a queue to a background thread, so request handlers
+# never block on stderr writes
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)])
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Algae Watch API", version="1.0.0")
+# Fraction of successful analyses that get a completion log line
+LOG_SAMPLE_RATE = 0.1
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client for all outbound HTTP, so upstream TLS handshakes
+    # are paid once per connection rather than once per request
+    app.state.http = httpx.AsyncClient(
+        timeout=10.0,
+        # Retry failed connection attempts with backoff; a request that
+        # reached the server is never resent
+        transport=httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_keepalive_connections=50), retries=3
+        ),
+    )
+    start_batcher()
+    yield
+    await stop_batcher()
+    await close_client()
+    await app.state.http.aclose()
+
+
+app = FastAPI(title="Algae Watch API", version="1.0.0", lifespan=lifespan)
 
 # --- FIX 1: OPEN CORS (Hackathon Friendly) ---
 app.add_middleware(
@@ -40,6 +85,12 @@ os.makedirs(assets_dir, exist_ok=True)
 app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
 
 
+class StatusResponse(BaseModel):
+    status: str
+    service: str
+    version: str
+
+
 # --- FIX 2: ADD DEFAULTS (Lake Erie Safety Net) ---
 class AnalyzeRequest(BaseModel):
     lat: float = 41.85
@@ -54,42 +105,103 @@ class AnalyzeResponse(BaseModel):
     flight_path: List[List[float]]
 
 
-@app.get("/api/status")
+# Each point costs one coordinate against the Open-Meteo rate limit, so a
+# single request is capped at a few upstream calls (WIND_BATCH_MAX per call)
+BATCH_POINTS_MAX = 500
+
+
+class AnalyzeBatchRequest(BaseModel):
+    points: List[Tuple[float, float]] = Field(max_length=BATCH_POINTS_MAX)  # [lat, lon] pairs
+
+
+class AnalyzeBatchResponse(BaseModel):
+    bboxes: List[List[float]]
+    risk_scores: List[float]
+    drift_vectors: List[List[float]]
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http
+
+
+# Serialized responses cached per ~1 km cell (lat/lon rounded to 0.01) so
+# repeated map polls skip the wind API, drift, LLM and JSON encoding entirely.
+_ANALYZE_CACHE = TTLCache(maxsize=2048, ttl=120)
+
+# Tactical note appended to every report so the text matches the orange line on the map
+MISSION_TEXT = "\nTACTICAL PLAN: Drone Intercept Pattern Generated (Zig-Zag Grid)."
+
+
+@app.get("/api/status", response_model=StatusResponse)
 async def health_check():
-    return {"status": "online", "service": "Algae Watch API", "version": "1.0.0"}
+    return StatusResponse(status="online", service="Algae Watch API", version="1.0.0")
 
 
-def _lat_lon_to_bbox(lat: float, lon: float, size_degrees: float = 0.1) -> List[float]:
+# cos(latitude) at 0.1 degree resolution, floored at 0.01 near the poles,
+# indexed by int((lat + 90) * 10)
+_COS_LAT = np.maximum(np.abs(np.cos(np.radians(np.arange(-90, 90.1, 0.1)))), 0.01)
+
+
+def _lat_lon_to_bbox_vec(
+    lat: np.ndarray, lon: np.ndarray, size_degrees: float = 0.1
+) -> np.ndarray:
+    # Vectorized over N points; returns an (N, 4) array of bboxes
     half_size = size_degrees / 2.0
     min_lon = lon - half_size
     max_lon = lon + half_size
-    lat_correction = max(abs(math.cos(math.radians(lat))), 0.01)
+    lat_index = ((np.clip(lat, -90.0, 90.0) + 90.0) * 10).astype(np.intp)
+    lat_correction = _COS_LAT[lat_index]
     adjusted_lat_size = half_size / lat_correction
-    min_lat = max(-90, lat - adjusted_lat_size)
-    max_lat = min(90, lat + adjusted_lat_size)
-    return [min_lon, min_lat, max_lon, max_lat]
+    min_lat = np.maximum(-90.0, lat - adjusted_lat_size)
+    max_lat = np.minimum(90.0, lat + adjusted_lat_size)
+    return np.column_stack((min_lon, min_lat, max_lon, max_lat))
 
 
-def _calculate_risk_score(lat: float, lon: float) -> float:
+def _lat_lon_to_bbox(lat: float, lon: float, size_degrees: float = 0.1) -> List[float]:
+    return _lat_lon_to_bbox_vec(np.array([lat]), np.array([lon]), size_degrees)[0].tolist()
+
+
+def _calculate_risk_score_vec(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
     # Placeholder logic
-    coastal_proximity = abs(lat)
-    mock_score = min(0.8, 0.3 + (coastal_proximity / 90.0) * 0.5)
-    return round(mock_score, 2)
+    coastal_proximity = np.abs(lat)
+    mock_score = np.minimum(0.8, 0.3 + (coastal_proximity / 90.0) * 0.5)
+    return np.round(mock_score, 2)
+
+
+def _calculate_risk_score(lat: float, lon: float) -> float:
+    return float(_calculate_risk_score_vec(np.array([lat]), np.array([lon]))[0])
+
+
+def _risk_from_wind(wind_speed: float) -> float:
+    # Calm water lets blooms concentrate; strong wind mixes them out
+    calculated_risk = 0.90 - (wind_speed * 0.02)
+    return max(0.10, min(0.95, calculated_risk))
 
 
 @app.post("/api/analyze", response_model=AnalyzeResponse)
-async def analyze_location(request: AnalyzeRequest):
-    logger.info(f"Analyzing location: ({request.lat}, {request.lon})")
+async def analyze_location(
+    request: AnalyzeRequest, http: httpx.AsyncClient = Depends(get_http_client)
+):
+    cache_key = (round(request.lat, 2), round(request.lon, 2))
+    cached = _ANALYZE_CACHE.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    logger.info("Analyzing location: (%s, %s)", request.lat, request.lon)
 
-    # 1. Fetch Real Wind Data
-    wind_speed, wind_deg = get_wind_data(request.lat, request.lon)
+    # 1. Fetch Real Wind Data (calm fallback if Open-Meteo is unreachable)
+    wind = await get_wind_data(request.lat, request.lon, http)
+    wind_speed, wind_deg = wind if wind is not None else (0.0, 0.0)
 
     # 2. Dynamic Risk Calculation
-    calculated_risk = 0.90 - (wind_speed * 0.02)
-    risk_score = max(0.10, min(0.95, calculated_risk))
+    risk_score = _risk_from_wind(wind_speed)
 
-    # 3. Calculate Drift Vector
-    drift_vec = predict_drift(request.lat, request.lon)
+    # 3. Calculate Drift Vector and generate the base report concurrently
+    # (the report only needs wind + risk, not the drift result)
+    drift_vec, (ai_text, report_ok) = await asyncio.gather(
+        predict_drift(request.lat, request.lon, http),
+        generate_situation_report(risk_score, wind_speed, wind_deg),
+    )
 
     # --- PHASE 4 NEW LOGIC STARTS HERE ---
 
@@ -99,28 +211,115 @@ async def analyze_location(request: AnalyzeRequest):
         request.lat, request.lon, drift_vec[0], drift_vec[1]
     )
 
-    # 5. Enhance the AI Report
-    # We append a tactical note so the text matches the orange line on the map
-    mission_text = "\nTACTICAL PLAN: Drone Intercept Pattern Generated (Zig-Zag Grid)."
-
-    # Generate the base report
-    ai_text = generate_situation_report(risk_score, wind_speed, wind_deg)
-
-    # Combine them
-    full_report = f"{ai_text}{mission_text}"
+    # 5. Enhance the AI Report with the tactical note
+    full_report = f"{ai_text}{MISSION_TEXT}"
 
     # --- PHASE 4 NEW LOGIC ENDS HERE ---
 
-    return AnalyzeResponse(
+    # Every field was computed here with known types, so skip validation and
+    # return the JSON directly; response_model still documents the schema
+    response = AnalyzeResponse.model_construct(
         image_url="/assets/demo_heatmap.png",
         risk_score=risk_score,
         drift_vector=drift_vec,
         ai_report=full_report,  # Sending the enhanced text
         flight_path=flight_path,  # Sending the real flight coordinates
     )
+    body = response.model_dump_json().encode()
+    # Degraded responses (no wind data, or a fallback report) are not cached,
+    # so the cell recovers as soon as the upstream services do
+    if wind is not None and report_ok:
+        _ANALYZE_CACHE[cache_key] = body
+
+    if random.random() < LOG_SAMPLE_RATE:
+        logger.info(
+            "Analysis complete: (%s, %s) risk=%.2f", request.lat, request.lon, risk_score
+        )
+    return Response(content=body, media_type="application/json")
+
+
+@app.post("/api/analyze/stream")
+async def analyze_location_stream(
+    request: AnalyzeRequest, http: httpx.AsyncClient = Depends(get_http_client)
+):
+    """
+    Server-Sent Events variant of /api/analyze. The non-LLM fields arrive
+    first as a `metadata` event, then the report streams as `sitrep` events
+    (JSON-encoded text chunks), followed by a final `done` event. If the
+    report is cut off mid-stream, an `error` event is sent before `done`.
+    """
+    logger.info("Streaming analysis for: (%s, %s)", request.lat, request.lon)
+
+    wind = await get_wind_data(request.lat, request.lon, http)
+    wind_speed, wind_deg = wind if wind is not None else (0.0, 0.0)
+    risk_score = _risk_from_wind(wind_speed)
+    drift_vec = await predict_drift(request.lat, request.lon, http)
+    flight_path = generate_flight_path(
+        request.lat, request.lon, drift_vec[0], drift_vec[1]
+    )
+
+    metadata = {
+        "image_url": "/assets/demo_heatmap.png",
+        "risk_score": risk_score,
+        "drift_vector": drift_vec,
+        "flight_path": flight_path,
+    }
+
+    async def events():
+        yield f"event: metadata\ndata: {json.dumps(metadata)}\n\n"
+        try:
+            async for chunk in stream_situation_report(risk_score, wind_speed, wind_deg):
+                yield f"event: sitrep\ndata: {json.dumps(chunk)}\n\n"
+        except Exception:
+            error = {"message": "SITREP stream interrupted"}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+        else:
+            yield f"event: sitrep\ndata: {json.dumps(MISSION_TEXT)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/api/analyze_batch", response_model=AnalyzeBatchResponse)
+async def analyze_batch(
+    request: AnalyzeBatchRequest, http: httpx.AsyncClient = Depends(get_http_client)
+):
+    # One conversion up front, then every helper works on whole arrays
+    coords = np.asarray(request.points, dtype=np.float64).reshape(-1, 2)
+    lat, lon = coords[:, 0], coords[:, 1]
+    # NaN/inf would index garbage out of _COS_LAT and out-of-range values give
+    # inverted bboxes. Checked here rather than in the model, since a
+    # validation error echoing NaN can't be JSON-encoded.
+    # (NaN fails both comparisons, so this also rejects non-finite values)
+    if not ((np.abs(lat) <= 90.0).all() and (np.abs(lon) <= 180.0).all()):
+        raise HTTPException(
+            status_code=422,
+            detail="Coordinates must be finite, with -90 <= lat <= 90 and -180 <= lon <= 180",
+        )
+
+    # All points share a single Open-Meteo round trip
+    drift = await predict_drift_batch(lat.tolist(), lon.tolist(), http)
+
+    return AnalyzeBatchResponse(
+        bboxes=_lat_lon_to_bbox_vec(lat, lon).tolist(),
+        risk_scores=_calculate_risk_score_vec(lat, lon).tolist(),
+        drift_vectors=drift.tolist(),
+    )
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers need an import string rather than the app object.
+    # The endpoints are I/O-bound, so throughput scales with worker count.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="auto",  # uvloop when installed (uvicorn[standard])
+        http="auto",  # httptools when installed
+        timeout_keep_alive=30,
+        limit_concurrency=256,
+        limit_max_requests=10000,  # recycle workers to bound memory growth
+    )
@@ -1,56 +1,627 @@
 import os
+import json
+import asyncio
 import logging
+import httpx
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
-def generate_situation_report(risk_score: float, wind_speed: float, wind_dir: float) -> str:
+load_dotenv()
+
+_API_KEY = os.getenv("OPENROUTER_API_KEY")
+_MODEL = "google/gemini-2.0-flash-001"
+
+# One pooled client for the whole process so calls reuse keep-alive
+# connections to OpenRouter instead of paying a TLS handshake each time.
+# Built on first use and closed by close_client() at shutdown.
+_client: Optional[AsyncOpenAI] = None
+
+# Reports are cached per input bucket: risk to 0.05, wind speed to 1 km/h,
+# wind direction to 10 degrees. Nearby readings share one LLM call.
+RISK_STEP = 0.05
+WIND_DIR_STEP = 10.0
+
+_REPORT_CACHE = TTLCache(maxsize=4096, ttl=600)
+# Fallback texts are kept briefly so a provider outage doesn't storm the API
+_FAILURE_CACHE = TTLCache(maxsize=1024, ttl=30)
+
+# Pending LLM calls per bucket; duplicate callers await the same task
+_inflight: Dict[Tuple[int, int, int], asyncio.Task] = {}
+
+# Micro-batching: cache misses are queued and the collector folds up to
+# BATCH_MAX of them arriving within BATCH_WINDOW_S into one completion.
+BATCH_MAX = 8
+BATCH_WINDOW_S = 0.1
+
+# Per-attempt timeout and SDK-level retries for every LLM call, so a single
+# completion takes at most LLM_TIMEOUT_S * (LLM_MAX_RETRIES + 1) plus backoff
+LLM_TIMEOUT_S = 10.0
+LLM_MAX_RETRIES = 1
+_LLM_CALL_MAX_S = LLM_TIMEOUT_S * (LLM_MAX_RETRIES + 1)
+
+# A queued request that hasn't been answered by then (the batch completion,
+# then the per-item retries, each a full call, plus slack for the window and
+# retry backoff) is sent on its own instead. Set past the worst case so a
+# slow-but-alive batch never gets a duplicate direct call.
+BATCH_TIMEOUT_S = 2 * _LLM_CALL_MAX_S + 5.0
+_QUEUE_MAX = 64
+
+# Stable prompt prefix shared by every report call. It is deliberately long,
+# past the 1024-token minimum for provider prompt caching, so it is served
+# from the cache instead of being re-processed on each request. The length is
+# guarded by a word-count test, since every word is at least one token.
+_SYSTEM_PROMPT = """
+You are an environmental crisis commander and tactical environmental analyst
+for BloomGuard, a live dashboard that tracks harmful algal blooms (HABs) on
+large freshwater lakes such as Lake Erie. Operators read your output on a
+single dashboard panel while coordinating a drone response team based at
+Port Stanley, Ontario. Your job is to turn raw sensor readings into a short,
+decisive SITUATION REPORT (SITREP).
+
+INPUT FORMAT
+Each request gives one or more readings in the form:
+    Risk=<0.00-1.00> Wind=<speed> km/h Dir=<degrees>
+- Risk is the algae toxicity risk on a 0-1.0 scale derived from satellite
+  chlorophyll analysis and wind conditions.
+- Wind is the 10 m wind speed in km/h.
+- Dir is the meteorological wind direction in degrees: the direction the
+  wind is blowing FROM, measured clockwise from true north (0 = north,
+  90 = east, 180 = south, 270 = west).
+
+INTERPRETATION RULES
+- Surface scum drifts DOWNWIND, i.e. toward Dir + 180 degrees. A wind from
+  270 (west) pushes the bloom east. Always state the drift heading as a
+  compass direction (N, NE, E, SE, S, SW, W, NW).
+- Surface drift speed is roughly 3 percent of wind speed. Quote it in km/h
+  when it helps the operator judge urgency.
+- Risk bands:
+    0.00-0.30  LOW: bloom is diffuse; routine monitoring.
+    0.30-0.60  ELEVATED: localized concentrations; targeted sampling.
+    0.60-0.80  HIGH: dense surface scum likely; intake and beach advisories.
+    0.80-1.00  CRITICAL: toxic mat forming; immediate intercept required.
+- Calm winds (under 5 km/h) let scum accumulate in place and raise toxin
+  concentration; strong winds (over 30 km/h) mix the water column and
+  disperse the surface mat but spread it over a wider area.
+- Shorelines, water intakes and beaches downwind of the bloom are the
+  priority assets to protect.
+- When several readings are supplied together, treat each one as a
+  separate location. Never mix numbers between readings.
+
+WIND DIRECTION REFERENCE
+Dir is where the wind comes FROM; the bloom drifts the opposite way.
+    Dir   0 (N)    wind from north      -> drift toward S
+    Dir  45 (NE)   wind from northeast  -> drift toward SW
+    Dir  90 (E)    wind from east       -> drift toward W
+    Dir 135 (SE)   wind from southeast  -> drift toward NW
+    Dir 180 (S)    wind from south      -> drift toward N
+    Dir 225 (SW)   wind from southwest  -> drift toward NE
+    Dir 270 (W)    wind from west       -> drift toward E
+    Dir 315 (NW)   wind from northwest  -> drift toward SE
+Round to the nearest of these eight headings (use the 16-point names such
+as NNE or WSW only when the reading falls clearly between two of them).
+Approximate surface drift speeds at 3 percent of wind speed:
+    5 km/h wind  -> 0.15 km/h drift
+    10 km/h wind -> 0.3 km/h drift
+    20 km/h wind -> 0.6 km/h drift
+    30 km/h wind -> 0.9 km/h drift
+    40 km/h wind -> 1.2 km/h drift
+
+LAKE ERIE CONTEXT
+- The western basin (west of Point Pelee and the Bass Islands) is shallow,
+  warms first in summer and receives most of the nutrient load from the
+  Maumee River at Toledo. It is where the largest blooms usually start.
+- The central basin is deeper and wider; Port Stanley sits on its north
+  shore. Blooms reaching it usually arrive as drifting surface scum from
+  the west rather than forming in place.
+- The eastern basin is the deepest and coldest and rarely hosts dense
+  blooms.
+- Municipal drinking water intakes, public beaches, marinas and the
+  shorelines of the islands are the assets most exposed to drifting scum.
+  A bloom heading toward the south shore threatens Ohio intakes and
+  beaches; one heading north threatens the Ontario shoreline between
+  Point Pelee and Long Point.
+
+BLOOM BEHAVIOUR
+- Most Lake Erie blooms are cyanobacteria (chiefly Microcystis) that
+  produce microcystin, a liver toxin that is dangerous to people, pets and
+  livestock and is not removed by boiling water.
+- Cells are buoyant: in calm, warm weather they float up and concentrate
+  into a surface mat, and the highest toxin levels are found there and
+  along the downwind shore where scum piles up.
+- Wind-driven mixing pulls cells down into the water column. The surface
+  looks clearer, but the bloom is still present and can resurface within
+  hours once the wind drops.
+- Blooms peak from late July to September and can persist into October.
+
+OPERATIONAL CONSTRAINTS
+- Drones launch from Port Stanley on the north shore and have roughly 40
+  minutes of endurance, so favour compact patterns close to the bloom.
+- Drones must not operate in sustained winds above 45 km/h; if the reading
+  exceeds this, recommend holding at base and monitoring by satellite.
+- Crews cannot sample inside a dense toxic mat without protective gear;
+  flag CRITICAL readings so ground teams can issue advisories.
+
+DRONE DEPLOYMENT OPTIONS
+- Zig-zag intercept grid along the predicted drift path (default).
+- Perimeter orbit to map the bloom edge when the mat is stationary.
+- Leading-edge sweep ahead of the drift when winds are strong.
+- Spot sampling passes over the densest cells when risk is low.
+Pick the option that matches the readings and say why in a few words.
+
+OUTPUT FORMAT
+- Exactly 2 sentences, plain text, no markdown, no bullet points, no
+  headings, no quotation marks around the report.
+- Sentence 1: assess the immediate threat, including risk band, drift
+  heading and intensity.
+- Sentence 2: recommend a specific drone deployment strategy.
+- Tone: urgent, technical, precise. Use military-style brevity. Never
+  mention that you are an AI model and never ask follow-up questions.
+- Keep the report under 60 words.
+
+EXAMPLES
+Readings: Risk=0.85 Wind=4 km/h Dir=270°
+SITREP: CRITICAL toxicity with near-calm westerly winds is holding a dense
+surface mat in place and nudging it slowly east at roughly 0.1 km/h.
+Deploy a perimeter orbit to map the mat boundary, then a tight zig-zag
+intercept over the eastern edge to protect downwind intakes.
+
+Readings: Risk=0.55 Wind=18 km/h Dir=200°
+SITREP: ELEVATED risk bloom is drifting NNE at about 0.5 km/h under
+moderate south-southwesterly winds, threatening the northern shoreline
+within hours. Launch a zig-zag intercept grid along the NNE drift axis and
+stage a second drone at the leading edge for sampling.
+
+Readings: Risk=0.25 Wind=34 km/h Dir=45°
+SITREP: LOW risk conditions as strong northeasterly winds mix the water
+column and disperse the bloom SW at roughly 1 km/h across a widening area.
+Conduct a leading-edge sweep to the southwest with spot sampling passes to
+confirm dispersal.
+
+Readings: Risk=0.70 Wind=12 km/h Dir=120°
+SITREP: HIGH risk scum is drifting NW at about 0.4 km/h under
+east-southeasterly winds toward populated beaches on the northwest shore.
+Execute a zig-zag intercept grid along the NW drift path and prioritize
+coverage ahead of the beach approaches.
+
+Readings: Risk=0.40 Wind=48 km/h Dir=250°
+SITREP: ELEVATED risk bloom is being mixed down and spread ENE at about
+1.4 km/h by near-gale west-southwesterly winds that exceed drone limits.
+Hold all drones at base and track the bloom by satellite until sustained
+winds drop below 45 km/h, then fly a leading-edge sweep to the ENE.
+
+Readings: Risk=0.62 Wind=8 km/h Dir=10°
+SITREP: HIGH risk scum is accumulating under light northerly winds and
+creeping S at roughly 0.2 km/h toward south shore intakes and beaches.
+Launch a zig-zag intercept grid along the southward drift axis and alert
+downwind water utilities to increase intake monitoring.
+
+Readings: Risk=0.33 Wind=15 km/h Dir=160°
+SITREP: ELEVATED risk with a diffuse bloom drifting NNW at about 0.45 km/h
+under south-southeasterly winds toward the Ontario shoreline. Fly spot
+sampling passes over the densest cells, then a zig-zag intercept along the
+NNW drift path if concentrations rise.
+"""
+
+# Risk saturates at the ends of the wind range (calm water / gale), where the
+# report barely depends on the inputs. Those bands use pre-authored SITREPs,
+# indexed by the quadrant the wind blows FROM (0 = N-E, 1 = E-S, 2 = S-W,
+# 3 = W-N), and skip the LLM. The low band covers every gale, so it is split
+# at the drone wind limit: above it the templates hold drones at base.
+HIGH_RISK_TEMPLATE_MIN = 0.88
+LOW_RISK_TEMPLATE_MAX = 0.12
+DRONE_MAX_WIND_KMH = 45.0
+
+_HIGH_RISK_TEMPLATES = (
+    "CRITICAL toxicity under near-calm winds is letting a dense surface mat "
+    "accumulate in place with only a slow creep to the southwest. Deploy a "
+    "perimeter orbit to map the mat boundary, then a tight zig-zag intercept "
+    "along its southwestern edge.",
+    "CRITICAL toxicity under near-calm winds is letting a dense surface mat "
+    "accumulate in place with only a slow creep to the northwest. Deploy a "
+    "perimeter orbit to map the mat boundary, then a tight zig-zag intercept "
+    "along its northwestern edge.",
+    "CRITICAL toxicity under near-calm winds is letting a dense surface mat "
+    "accumulate in place with only a slow creep to the northeast. Deploy a "
+    "perimeter orbit to map the mat boundary, then a tight zig-zag intercept "
+    "along its northeastern edge.",
+    "CRITICAL toxicity under near-calm winds is letting a dense surface mat "
+    "accumulate in place with only a slow creep to the southeast. Deploy a "
+    "perimeter orbit to map the mat boundary, then a tight zig-zag intercept "
+    "along its southeastern edge.",
+)
+
+_LOW_RISK_TEMPLATES = (
+    "LOW risk as strong northeasterly winds mix the water column and disperse "
+    "the bloom rapidly to the southwest over a widening area. Fly a cautious "
+    "leading-edge sweep to the southwest and hold at base if gusts approach "
+    "drone limits.",
+    "LOW risk as strong southeasterly winds mix the water column and disperse "
+    "the bloom rapidly to the northwest over a widening area. Fly a cautious "
+    "leading-edge sweep to the northwest and hold at base if gusts approach "
+    "drone limits.",
+    "LOW risk as strong southwesterly winds mix the water column and disperse "
+    "the bloom rapidly to the northeast over a widening area. Fly a cautious "
+    "leading-edge sweep to the northeast and hold at base if gusts approach "
+    "drone limits.",
+    "LOW risk as strong northwesterly winds mix the water column and disperse "
+    "the bloom rapidly to the southeast over a widening area. Fly a cautious "
+    "leading-edge sweep to the southeast and hold at base if gusts approach "
+    "drone limits.",
+)
+
+_GALE_TEMPLATES = (
+    "LOW risk as gale-force northeasterly winds mix the water column and "
+    "spread the bloom rapidly to the southwest, but sustained winds exceed "
+    "drone limits. Hold all drones at base and track the bloom by satellite "
+    "until winds drop below 45 km/h.",
+    "LOW risk as gale-force southeasterly winds mix the water column and "
+    "spread the bloom rapidly to the northwest, but sustained winds exceed "
+    "drone limits. Hold all drones at base and track the bloom by satellite "
+    "until winds drop below 45 km/h.",
+    "LOW risk as gale-force southwesterly winds mix the water column and "
+    "spread the bloom rapidly to the northeast, but sustained winds exceed "
+    "drone limits. Hold all drones at base and track the bloom by satellite "
+    "until winds drop below 45 km/h.",
+    "LOW risk as gale-force northwesterly winds mix the water column and "
+    "spread the bloom rapidly to the southeast, but sustained winds exceed "
+    "drone limits. Hold all drones at base and track the bloom by satellite "
+    "until winds drop below 45 km/h.",
+)
+
+_OFFLINE_TEXT = "SYSTEM OFFLINE: Unable to connect to Command Uplink."
+
+_queue: Optional[asyncio.Queue] = None
+_collector: Optional[asyncio.Task] = None
+_batch_tasks: Set[asyncio.Task] = set()
+
+
+def _quantize(risk_score: float, wind_speed: float, wind_dir: float) -> Tuple[int, int, int]:
+    return (
+        round(risk_score / RISK_STEP),
+        round(wind_speed),
+        round(wind_dir / WIND_DIR_STEP) % 36,
+    )
+
+
+async def generate_situation_report(
+    risk_score: float, wind_speed: float, wind_dir: float
+) -> Tuple[str, bool]:
     """
     Uses OpenRouter to access Gemini Flash 2.0 for the tactical report.
+    Reports are served from an in-process TTL cache keyed by the quantized inputs,
+    and concurrent requests for the same bucket share a single LLM call.
+    Returns the report text and whether it is a real report rather than an
+    error/offline fallback.
+    """
+    template = _template_report(risk_score, wind_speed, wind_dir)
+    if template is not None:
+        return template, True
+
+    key = _quantize(risk_score, wind_speed, wind_dir)
+
+    cached = _REPORT_CACHE.get(key)
+    if cached is not None:
+        return cached, True
+    failed = _FAILURE_CACHE.get(key)
+    if failed is not None:
+        return failed, False
+
+    # The LLM call runs in its own task so that a cancelled caller (e.g. a
+    # client that disconnected) never cancels it for the others awaiting it
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_resolve_report(key))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _resolve_report(key: Tuple[int, int, int]) -> Tuple[str, bool]:
+    report, ok = await _dispatch(key)
+    if ok:
+        _REPORT_CACHE[key] = report
+    else:
+        _FAILURE_CACHE[key] = report
+    return report, ok
+
+
+async def stream_situation_report(
+    risk_score: float, wind_speed: float, wind_dir: float
+) -> AsyncIterator[str]:
     """
-    load_dotenv()
-    
-    # 1. Get the OpenRouter Key
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    
-    if not api_key:
+    Streaming variant of generate_situation_report. Yields the report in
+    chunks as the model produces them; cached and templated reports arrive
+    as a single chunk. Completed streams are written to the report cache.
+    If the upstream stream fails after some chunks were yielded, the error
+    is re-raised so the caller can tell the report is truncated.
+    """
+    template = _template_report(risk_score, wind_speed, wind_dir)
+    if template is not None:
+        yield template
+        return
+
+    key = _quantize(risk_score, wind_speed, wind_dir)
+    cached = _REPORT_CACHE.get(key) or _FAILURE_CACHE.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    client = _get_client()
+    if client is None:
         logger.error("CRITICAL: OPENROUTER_API_KEY is missing.")
-        return "SYSTEM ERROR: API Key missing."
+        _FAILURE_CACHE[key] = "SYSTEM ERROR: API Key missing."
+        yield _FAILURE_CACHE[key]
+        return
 
+    chunks: List[str] = []
     try:
-        # 2. Configure Client
-        client = OpenAI(
+        stream = await client.chat.completions.create(
+            model=_MODEL,
+            messages=_report_messages(key),
+            stream=True,
+        )
+        async for event in stream:
+            if not event.choices:
+                continue
+            delta = event.choices[0].delta.content
+            if delta:
+                chunks.append(delta)
+                yield delta
+    except Exception as e:
+        logger.error("AI Generation failed: %s", e)
+        if chunks:
+            # Part of the report already went out; let the caller flag it
+            raise
+        _FAILURE_CACHE[key] = _OFFLINE_TEXT
+        yield _OFFLINE_TEXT
+        return
+
+    _REPORT_CACHE[key] = "".join(chunks)
+
+
+def _get_client() -> Optional[AsyncOpenAI]:
+    """
+    Returns the shared OpenRouter client, or None when the key is missing
+    so importing this module never fails.
+    """
+    global _client
+    if _client is None and _API_KEY:
+        _client = AsyncOpenAI(
             base_url="https://openrouter.ai/api/v1",
-            api_key=api_key,
+            api_key=_API_KEY,
+            timeout=LLM_TIMEOUT_S,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+                timeout=LLM_TIMEOUT_S,
+            ),
         )
+    return _client
 
-        prompt = f"""
-        You are an environmental crisis commander. 
-        Current Status:
-        - Algae Toxicity Risk: {risk_score:.2f} (Scale 0-1.0)
-        - Wind Speed: {wind_speed} km/h
-        - Wind Direction: {wind_dir} degrees
-        
-        Task: Write a 2-sentence SITUATION REPORT for the dashboard.
-        1. First sentence: Assess the immediate threat (drift direction, intensity).
-        2. Second sentence: Recommend a specific drone deployment strategy.
-        
-        Tone: Urgent, technical, precise. 
-        Output text only. No markdown formatting.
-        """
-
-        # 3. Call Gemini Flash 2.0
-        completion = client.chat.completions.create(
-            model="google/gemini-2.0-flash-001", 
-            messages=[
-                {"role": "system", "content": "You are a tactical environmental analyst."},
-                {"role": "user", "content": prompt}
-            ]
+
+async def close_client() -> None:
+    """
+    Closes the pooled OpenRouter connections. Call from the app's shutdown hook.
+    """
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def _template_report(
+    risk_score: float, wind_speed: float, wind_dir: float
+) -> Optional[str]:
+    quadrant = int(wind_dir / 90) % 4
+    if risk_score >= HIGH_RISK_TEMPLATE_MIN:
+        return _HIGH_RISK_TEMPLATES[quadrant]
+    if risk_score <= LOW_RISK_TEMPLATE_MAX:
+        if wind_speed > DRONE_MAX_WIND_KMH:
+            return _GALE_TEMPLATES[quadrant]
+        return _LOW_RISK_TEMPLATES[quadrant]
+    return None
+
+
+async def _request_report(key: Tuple[int, int, int]) -> Tuple[str, bool]:
+    """
+    Calls the LLM for one quantized input bucket.
+    Returns the report text and whether it came from the model.
+    """
+    # 1. Check the shared OpenRouter client
+    client = _get_client()
+    if client is None:
+        logger.error("CRITICAL: OPENROUTER_API_KEY is missing.")
+        return "SYSTEM ERROR: API Key missing.", False
+
+    try:
+        # 2. Call Gemini Flash 2.0
+        completion = await client.chat.completions.create(
+            model=_MODEL,
+            messages=_report_messages(key),
         )
 
-        return completion.choices[0].message.content
+        return completion.choices[0].message.content, True
+
+    except Exception as e:
+        logger.error("AI Generation failed: %s", e)
+        return _OFFLINE_TEXT, False
+
+
+def _build_messages(user_content: str) -> List[dict]:
+    """
+    Puts the stable system prompt first and the per-request readings last.
+    The system block is marked for provider-side prompt caching.
+    """
+    # Prompt caching only matches on an identical prefix: _SYSTEM_PROMPT must
+    # stay the first message and must not contain any per-request values.
+    return [
+        {
+            "role": "system",
+            "content": [
+                {
+                    "type": "text",
+                    "text": _SYSTEM_PROMPT,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+        },
+        {"role": "user", "content": user_content},
+    ]
+
+
+def _report_messages(key: Tuple[int, int, int]) -> List[dict]:
+    # The prompt is built from the bucket so every cache hit matches its text
+    return _build_messages(
+        f"{_format_reading(*_bucket_values(key))}\n"
+        "Write the SITUATION REPORT. Output text only."
+    )
+
+
+def _format_reading(risk_score: float, wind_speed: float, wind_dir: float) -> str:
+    return f"Risk={risk_score:.2f} Wind={wind_speed} km/h Dir={wind_dir:.0f}°"
+
+
+def _bucket_values(key: Tuple[int, int, int]) -> Tuple[float, int, float]:
+    return key[0] * RISK_STEP, key[1], key[2] * WIND_DIR_STEP
+
+
+def start_batcher() -> None:
+    """
+    Starts the background collector. Call from the app's startup hook.
+    """
+    global _queue, _collector
+    if _collector is None:
+        _queue = asyncio.Queue(maxsize=_QUEUE_MAX)
+        _collector = asyncio.create_task(_collect())
+
+
+async def stop_batcher() -> None:
+    """
+    Stops the collector and any running batches, and cancels anything still
+    waiting in the queue. Must run before close_client(), so no batch is left
+    calling the LLM on a closed client.
+    """
+    global _queue, _collector
+    if _collector is None:
+        return
+    _collector.cancel()
+    for task in _batch_tasks:
+        task.cancel()
+    await asyncio.gather(_collector, *_batch_tasks, return_exceptions=True)
+    while not _queue.empty():
+        _, fut = _queue.get_nowait()
+        fut.cancel()
+    _queue = None
+    _collector = None
+
+
+async def _dispatch(key: Tuple[int, int, int]) -> Tuple[str, bool]:
+    """
+    Hands one bucket to the batcher, or calls the LLM directly when the
+    batcher isn't running or its queue is full.
+    """
+    if _queue is None or _get_client() is None:
+        return await _request_report(key)
+
+    fut = asyncio.get_running_loop().create_future()
+    try:
+        _queue.put_nowait((key, fut))
+    except asyncio.QueueFull:
+        return await _request_report(key)
+
+    try:
+        return await asyncio.wait_for(fut, BATCH_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        logger.warning("AI batch timed out, requesting report directly")
+        return await _request_report(key)
+
+
+async def _collect() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _queue.get()]
+        deadline = loop.time() + BATCH_WINDOW_S
+        while len(batch) < BATCH_MAX:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Run the batch in its own task so collection continues meanwhile
+        task = asyncio.create_task(_run_batch(batch))
+        _batch_tasks.add(task)
+        task.add_done_callback(_batch_tasks.discard)
+
 
+async def _run_batch(batch: List[Tuple[Tuple[int, int, int], asyncio.Future]]) -> None:
+    keys = [key for key, _ in batch]
+    try:
+        if len(keys) == 1:
+            results = [await _request_report(keys[0])]
+        else:
+            results = await _request_batch(keys)
+    except asyncio.CancelledError:
+        # Shutting down: release the callers instead of leaving them to time out
+        for _, fut in batch:
+            fut.cancel()
+        raise
     except Exception as e:
-        logger.error(f"AI Generation failed: {e}")
-        return "SYSTEM OFFLINE: Unable to connect to Command Uplink."
+        logger.error("AI batch failed: %s", e)
+        results = [(_OFFLINE_TEXT, False)] * len(keys)
+
+    for (_, fut), result in zip(batch, results):
+        if not fut.done():
+            fut.set_result(result)
+
+
+async def _request_batch(keys: List[Tuple[int, int, int]]) -> List[Tuple[str, bool]]:
+    """
+    Asks for one SITREP per bucket in a single completion.
+    Entries the model drops or garbles are retried as individual calls.
+    """
+    inputs = "\n".join(
+        f"{i}. {_format_reading(*_bucket_values(key))}" for i, key in enumerate(keys, 1)
+    )
+    prompt = (
+        f"{inputs}\n"
+        f"Write one SITUATION REPORT per reading. Return exactly {len(keys)} lines of "
+        'JSON, one per reading, in the form {"id": <reading number>, "report": "<text>"}.'
+    )
+
+    try:
+        completion = await _get_client().chat.completions.create(
+            model=_MODEL,
+            messages=_build_messages(prompt),
+        )
+        content = completion.choices[0].message.content or ""
+    except Exception as e:
+        logger.error("AI Generation failed: %s", e)
+        return [(_OFFLINE_TEXT, False)] * len(keys)
+
+    reports: Dict[int, str] = {}
+    for line in content.splitlines():
+        try:
+            item = json.loads(line)
+            reports[int(item["id"])] = str(item["report"])
+        except (ValueError, KeyError, TypeError):
+            continue
+
+    results: List[Optional[Tuple[str, bool]]] = [
+        (reports[i], True) if i in reports else None for i in range(1, len(keys) + 1)
+    ]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        logger.warning(
+            "AI batch returned %d/%d reports", len(keys) - len(missing), len(keys)
+        )
+        retried = await asyncio.gather(*(_request_report(keys[i]) for i in missing))
+        for i, result in zip(missing, retried):
+            results[i] = result
+    return results
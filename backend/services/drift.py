@@ -1,78 +1,291 @@
 import httpx
 import math
+import time
+import asyncio
 import logging
-from typing import List, Tuple
+import numpy as np
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Wind is cached per (lat, lon) rounded to 0.1 degree (~11 km cells), well
+# within the spatial resolution of the weather model.
+WIND_TTL_S = 900.0  # Open-Meteo refreshes "current" values every 15 minutes
+WIND_MAX_STALE_S = 1800.0  # past this, a stale entry is refetched inline
+WIND_CACHE_MAX = 1024
+WIND_BATCH_MAX = 100  # coordinates per Open-Meteo request
 
-def get_wind_data(lat: float, lon: float) -> Tuple[float, float]:
+_wind_cache: Dict[Tuple[float, float], Tuple[float, Tuple[float, float]]] = {}
+_refreshing: Set[Tuple[float, float]] = set()
+_refresh_tasks: Set[asyncio.Task] = set()
+
+# Drift model: surface drift is ~3% of wind speed, over a 1 hour horizon,
+# converted to degrees at ~111 km per degree (rough approximation)
+DRIFT_FACTOR = 0.03
+DRIFT_HOURS = 1.0
+DRIFT_DEG_PER_KMH = DRIFT_FACTOR * DRIFT_HOURS / 111.0
+
+# Cells fetched ahead of time for a predicted drift position and not yet
+# used, and how often those prefetches were later used ("issued" / "hits").
+# Always a subset of _wind_cache's keys, so it's bounded by WIND_CACHE_MAX.
+_prefetched: Set[Tuple[float, float]] = set()
+PREFETCH_STATS: Counter = Counter()
+
+
+async def get_wind_data(
+    lat: float, lon: float, client: httpx.AsyncClient
+) -> Optional[Tuple[float, float]]:
     """
     Fetches wind speed (km/h) and direction (degrees) from Open-Meteo.
     Uses the Standard Weather API because Marine API often fails for Lakes.
+    Results are cached per 0.1 degree cell; expired entries are served while
+    a background refresh runs (stale-while-revalidate).
+    Returns None when the wind could not be fetched.
+    """
+    key = (round(lat, 1), round(lon, 1))
+    if not _valid_cell(key):
+        return None
+    wind = _cached_wind(key, client)
+    if wind is not None:
+        return wind
+
+    (wind,) = await _fetch_wind_data([key], client)
+    if wind is not None:
+        _store_wind(key, wind)
+    return wind
+
+
+async def get_wind_data_batch(
+    lats: List[float], lons: List[float], client: httpx.AsyncClient
+) -> List[Tuple[float, float]]:
+    """
+    Batch version of get_wind_data. Cells missing from the cache are fetched
+    from Open-Meteo in one request per WIND_BATCH_MAX cells, issued concurrently.
+    Invalid coordinates are never sent, since Open-Meteo rejects the whole
+    request over a single one; they get the (0.0, 0.0) fallback.
     """
+    keys = [(round(lat, 1), round(lon, 1)) for lat, lon in zip(lats, lons)]
+
+    winds: Dict[Tuple[float, float], Tuple[float, float]] = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        if not _valid_cell(key):
+            continue
+        wind = _cached_wind(key, client)
+        if wind is not None:
+            winds[key] = wind
+        else:
+            missing.append(key)
+
+    if missing:
+        # Large batches are split to keep URLs short; the chunks run concurrently
+        chunks = [
+            missing[i:i + WIND_BATCH_MAX] for i in range(0, len(missing), WIND_BATCH_MAX)
+        ]
+        results = await asyncio.gather(
+            *(_fetch_wind_data(chunk, client) for chunk in chunks)
+        )
+        fetched = [wind for chunk_winds in results for wind in chunk_winds]
+        for key, wind in zip(missing, fetched):
+            if wind is not None:
+                _store_wind(key, wind)
+                winds[key] = wind
+
+    return [winds.get(key, (0.0, 0.0)) for key in keys]
+
+
+def _valid_cell(key: Tuple[float, float]) -> bool:
+    # Also False for NaN, which fails every comparison
+    lat, lon = key
+    return abs(lat) <= 90.0 and abs(lon) <= 180.0
+
+
+def _cached_wind(
+    key: Tuple[float, float], client: httpx.AsyncClient
+) -> Optional[Tuple[float, float]]:
+    entry = _wind_cache.get(key)
+    if entry is None:
+        return None
+    fetched_at, wind = entry
+    if key in _prefetched:
+        _prefetched.discard(key)
+        PREFETCH_STATS["hits"] += 1
+    age = time.monotonic() - fetched_at
+    if age < WIND_TTL_S:
+        return wind
+    if age < WIND_MAX_STALE_S:
+        _schedule_refresh(key, client)
+        return wind
+    return None
+
+
+async def _fetch_wind_data(
+    points: List[Tuple[float, float]], client: httpx.AsyncClient
+) -> List[Optional[Tuple[float, float]]]:
+    """
+    Calls Open-Meteo once for all points, using its comma-separated
+    coordinate lists. Points that fail come back as None so they aren't cached.
+    The shared client keeps the connection to Open-Meteo alive between calls.
+    """
+    # Only the two "current" values are requested, so the JSON body is a few
+    # hundred bytes; FlatBuffers (openmeteo-requests) wouldn't pay off here and
+    # its client is synchronous, which would block the event loop.
     url = "https://api.open-meteo.com/v1/forecast"
     params = {
-        "latitude": lat,
-        "longitude": lon,
+        "latitude": ",".join(str(lat) for lat, _ in points),
+        "longitude": ",".join(str(lon) for _, lon in points),
         "current": ["wind_speed_10m", "wind_direction_10m"],
         "wind_speed_unit": "kmh",
     }
 
     try:
         # We use a timeout so it doesn't hang the server
-        with httpx.Client(timeout=5.0) as client:
-            response = client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        response = await client.get(url, params=params, timeout=5.0)
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        logger.error("Failed to fetch wind data: %s", e)
+        return [None] * len(points)
 
-            # Extract current conditions
-            current = data.get("current", {})
-            wind_speed = current.get("wind_speed_10m")
-            wind_dir = current.get("wind_direction_10m")
+    # A single location comes back as an object, several as a list
+    locations = data if isinstance(data, list) else [data]
+    if len(locations) != len(points):
+        logger.error(
+            "Wind data returned %d locations for %d points", len(locations), len(points)
+        )
+        return [None] * len(points)
 
-            if wind_speed is None or wind_dir is None:
-                logger.warning(f"No wind data found for ({lat}, {lon})")
-                return 0.0, 0.0
+    winds: List[Optional[Tuple[float, float]]] = []
+    for (lat, lon), location in zip(points, locations):
+        # Extract current conditions
+        current = location.get("current", {})
+        wind_speed = current.get("wind_speed_10m")
+        wind_dir = current.get("wind_direction_10m")
 
-            return float(wind_speed), float(wind_dir)
+        if wind_speed is None or wind_dir is None:
+            logger.warning("No wind data found for (%s, %s)", lat, lon)
+            winds.append(None)
+        else:
+            winds.append((float(wind_speed), float(wind_dir)))
+    return winds
 
-    except Exception as e:
-        logger.error(f"Failed to fetch wind data: {e}")
-        return 0.0, 0.0
+
+def _store_wind(
+    key: Tuple[float, float], wind: Tuple[float, float], prefetched: bool = False
+) -> None:
+    # Re-insert so dict order tracks fetch time and the oldest entry goes first
+    _wind_cache.pop(key, None)
+    if len(_wind_cache) >= WIND_CACHE_MAX:
+        oldest = next(iter(_wind_cache))
+        del _wind_cache[oldest]
+        _prefetched.discard(oldest)
+    _wind_cache[key] = (time.monotonic(), wind)
+    if prefetched:
+        _prefetched.add(key)
 
 
-def predict_drift(lat: float, lon: float) -> List[float]:
+def _schedule_refresh(
+    key: Tuple[float, float], client: httpx.AsyncClient, prefetch: bool = False
+) -> None:
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    task = asyncio.create_task(_refresh_wind(key, client, prefetch))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _refresh_wind(
+    key: Tuple[float, float], client: httpx.AsyncClient, prefetch: bool = False
+) -> None:
+    try:
+        (wind,) = await _fetch_wind_data([key], client)
+        if wind is not None:
+            _store_wind(key, wind, prefetch)
+    finally:
+        _refreshing.discard(key)
+
+
+async def predict_drift(
+    lat: float, lon: float, client: httpx.AsyncClient
+) -> List[float]:
     """
     Calculates a simple drift vector based on current wind.
     """
     # 1. Get real wind data
-    wind_speed, wind_deg = get_wind_data(lat, lon)
-
-    logger.info(f"Wind Data: {wind_speed} km/h at {wind_deg}°")
+    wind = await get_wind_data(lat, lon, client)
 
-    # 2. If no wind (API fail), return original spot
-    if wind_speed == 0:
+    # 2. If no wind (API fail or calm), return original spot
+    if wind is None or wind[0] == 0:
         return [lat, lon]
 
-    # 3. Calculate Drift (Simple Physics Model)
-    # Rule of thumb: Surface drift is ~3% of wind speed
-    # We pretend 1 hour has passed
-    drift_speed_kmh = wind_speed * 0.03
-    distance_km = drift_speed_kmh * 1.0  # 1 hour duration
+    wind_speed, wind_deg = wind
+    logger.info("Wind Data: %s km/h at %s°", wind_speed, wind_deg)
 
-    # 4. Convert Distance to Degrees (Rough Approximation)
-    # 1 degree lat approx 111km
-    degree_dist = distance_km / 111.0
+    # 3. Offset depends only on the wind, so it's memoized on the wind reading
+    # (speed to 0.1 km/h, direction to 1 degree: Open-Meteo's own precision)
+    delta_lat, delta_lon = _drift_offset(round(wind_speed * 10), round(wind_deg))
 
-    # Calculate new position
-    # Wind comes FROM a direction, drift goes TO the opposite
-    drift_dir_rad = math.radians(wind_deg - 180)
+    # Clamp latitude and wrap longitude into [-180, 180) without branching
+    new_lat = max(-90.0, min(90.0, lat + delta_lat))
+    new_lon = ((lon + delta_lon + 180.0) % 360.0) - 180.0
 
-    delta_lat = degree_dist * math.cos(drift_dir_rad)
-    delta_lon = degree_dist * math.sin(drift_dir_rad)
-
-    new_lat = lat + delta_lat
-    new_lon = lon + delta_lon
+    # 4. The dashboard usually asks about the drifted position next, so warm
+    # its wind cell in the background when it falls outside the current one
+    _prefetch_wind(lat, lon, new_lat, new_lon, client)
 
     return [new_lat, new_lon]
+
+
+def _prefetch_wind(
+    lat: float, lon: float, new_lat: float, new_lon: float, client: httpx.AsyncClient
+) -> None:
+    key = (round(new_lat, 1), round(new_lon, 1))
+    if key == (round(lat, 1), round(lon, 1)) or key in _wind_cache:
+        return
+    PREFETCH_STATS["issued"] += 1
+    # Marked as prefetched only once the fetch succeeds and is cached
+    _schedule_refresh(key, client, prefetch=True)
+
+
+@lru_cache(maxsize=8192)
+def _drift_offset(wind_speed_q: int, wind_deg_q: int) -> Tuple[float, float]:
+    """
+    Returns the (lat, lon) displacement in degrees after 1 hour of drift.
+    Takes wind speed in tenths of km/h and direction in whole degrees.
+    """
+    degree_dist = (wind_speed_q / 10.0) * DRIFT_DEG_PER_KMH
+
+    # Wind comes FROM a direction, drift goes TO the opposite:
+    # cos(x - 180°) = -cos(x), sin(x - 180°) = -sin(x)
+    wind_rad = math.radians(wind_deg_q)
+
+    return -degree_dist * math.cos(wind_rad), -degree_dist * math.sin(wind_rad)
+
+
+async def predict_drift_batch(
+    lats: List[float], lons: List[float], client: httpx.AsyncClient
+) -> np.ndarray:
+    """
+    Batch version of predict_drift for many blooms at once.
+    Returns an (N, 2) array of drifted [lat, lon] positions.
+    """
+    winds = await get_wind_data_batch(lats, lons, client)
+    wind = np.asarray(winds, dtype=np.float64).reshape(-1, 2)
+    wind_speed, wind_deg = wind[:, 0], wind[:, 1]
+
+    # Same model as _drift_offset, applied to all points at once; zero wind
+    # (API fail) gives zero distance, so those points stay in place
+    degree_dist = wind_speed * DRIFT_DEG_PER_KMH
+    wind_rad = np.radians(wind_deg)
+
+    new_lat = np.asarray(lats, dtype=np.float64) - degree_dist * np.cos(wind_rad)
+    new_lon = np.asarray(lons, dtype=np.float64) - degree_dist * np.sin(wind_rad)
+
+    # Clamp latitude and wrap longitude into [-180, 180), elementwise
+    return np.column_stack((
+        np.clip(new_lat, -90.0, 90.0),
+        (new_lon + 180.0) % 360.0 - 180.0,
+    ))
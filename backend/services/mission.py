@@ -1,5 +1,6 @@
 from typing import List
 import math
+import numpy as np
 
 # Port Stanley, Ontario - Home base for drone deployment
 PORT_STANLEY_LAT = 42.66
@@ -23,11 +24,9 @@ def generate_flight_path(
     
     Returns a list of [lat, lon] coordinates.
     """
-    path = []
-
     # PHASE 1: Deployment from Port Stanley to Algae Bloom
-    path.append([PORT_STANLEY_LAT, PORT_STANLEY_LON])  # Home base
-    path.append([algae_lat, algae_lon])  # Reach algae bloom location
+    home = [PORT_STANLEY_LAT, PORT_STANLEY_LON]  # Home base
+    bloom = [algae_lat, algae_lon]  # Reach algae bloom location
 
     # PHASE 2: Zigzag dispersal pattern along predicted drift path
     # Number of segments along the drift vector
@@ -36,44 +35,41 @@ def generate_flight_path(
     # Calculate drift vector direction (bearing in radians)
     dlat = drift_lat - algae_lat
     dlon = drift_lon - algae_lon
-    
-    # Calculate bearing of drift direction
-    drift_bearing = math.atan2(
-        dlon * math.cos(math.radians(algae_lat)),
-        dlat
-    )
-    
-    # Perpendicular direction (90 degrees to drift) for zigzag
-    perp_bearing = drift_bearing + (math.pi / 2)
-    
+
+    # Direction of drift as a unit vector (north = cos, east = sin of its
+    # bearing), with longitude scaled by cos(latitude) to make it isotropic.
+    # With no drift this falls back to a bearing of 0 (due north)
+    dx = dlon * math.cos(math.radians(algae_lat))
+    length = math.hypot(dx, dlat)
+    sin_bearing, cos_bearing = (dx / length, dlat / length) if length else (0.0, 1.0)
+
     # Step size along the drift vector
     lat_step = dlat / steps
     lon_step = dlon / steps
-    
+
     # Zigzag width (perpendicular to drift direction)
     # 0.015 degrees ≈ 1.5km width for coverage
     width_km = 1.5
     width_degrees = width_km / 111.0  # Approximate conversion
 
-    # Generate zigzag pattern along drift path
-    for i in range(1, steps + 1):
-        # Calculate center point along drift line
-        center_lat = algae_lat + (lat_step * i)
-        center_lon = algae_lon + (lon_step * i)
-        
-        # Calculate perpendicular offset for zigzag
-        # Account for latitude when calculating longitude offset
-        perp_lat_offset = width_degrees * math.cos(perp_bearing)
-        perp_lon_offset = width_degrees * math.sin(perp_bearing) / math.cos(math.radians(center_lat))
-        
-        # Zig (one side perpendicular to drift)
-        zig_lat = center_lat + perp_lat_offset
-        zig_lon = center_lon + perp_lon_offset
-        path.append([zig_lat, zig_lon])
-        
-        # Zag (other side perpendicular to drift)
-        zag_lat = center_lat - perp_lat_offset
-        zag_lon = center_lon - perp_lon_offset
-        path.append([zag_lat, zag_lon])
+    # Center points along the drift line, all steps at once
+    i = np.arange(1, steps + 1)
+    center_lat = algae_lat + (lat_step * i)
+    center_lon = algae_lon + (lon_step * i)
+
+    # Perpendicular offset for zigzag, 90 degrees to drift:
+    # cos(b + 90°) = -sin(b), sin(b + 90°) = cos(b)
+    # Account for latitude when calculating longitude offset
+    perp_lat_offset = -width_degrees * sin_bearing
+    perp_lon_offset = (
+        width_degrees * cos_bearing / np.cos(np.radians(center_lat))
+    )
+
+    # Interleave Zig (one side of the drift line) and Zag (the other side)
+    zigzag = np.empty((2 * steps, 2))
+    zigzag[0::2, 0] = center_lat + perp_lat_offset
+    zigzag[0::2, 1] = center_lon + perp_lon_offset
+    zigzag[1::2, 0] = center_lat - perp_lat_offset
+    zigzag[1::2, 1] = center_lon - perp_lon_offset
 
-    return path
+    return [home, bloom, *zigzag.tolist()]
@@ -3,42 +3,36 @@ Sentinel Hub service for fetching satellite imagery and detecting algae blooms.
 Implements NDCI (Normalized Difference Chlorophyll Index) analysis.
 """
 
+import io
 import os
+import hashlib
+import math
+import time
+from datetime import date, timedelta
+from functools import lru_cache
 from typing import List, Optional
 from pathlib import Path
 import logging
 
-try:
-    from sentinelhub import (
-        SHConfig,
-        BBox,
-        CRS,
-        DataCollection,
-        MimeType,
-        SentinelHubRequest,
-    )
-    import numpy as np
-    from PIL import Image
-
-    SENTINELHUB_AVAILABLE = True
-except ImportError:
-    SENTINELHUB_AVAILABLE = False
-    np = None
-    Image = None
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
-# Algae Evalscript: Red for NDCI > 0.2, Transparent for < 0.2
+# Algae Evalscript: returns NDCI as a single UINT8 band, encoded from
+# [-1, 1] to [0, 255]. The bloom threshold is applied in Python, so the tile
+# is 1 byte per pixel instead of 4 and the raw index stays available.
+# Values are floored, so each code covers [code, code + 1) / 127.5 - 1 and a
+# threshold on a code boundary is exact.
 ALGAE_EVALSCRIPT = """
 //VERSION=3
 function setup() {
     return {
         input: [{
-            bands: ["B04", "B05", "B08"]
+            bands: ["B04", "B05"]
         }],
         output: {
-            bands: 4,
-            sampleType: "AUTO"
+            bands: 1,
+            sampleType: "UINT8"
         }
     };
 }
@@ -46,28 +40,44 @@ function setup() {
 function evaluatePixel(samples) {
     // Calculate NDCI (Normalized Difference Chlorophyll Index)
     // NDCI = (B05 - B04) / (B05 + B04)
-    // B04 = Red, B05 = Red Edge 1, B08 = NIR
-    
+    // B04 = Red, B05 = Red Edge 1
+
     const red = samples.B04;
     const redEdge = samples.B05;
-    const nir = samples.B08;
-    
+
     // Calculate NDCI
     const denominator = redEdge + red;
     const ndci = denominator != 0 ? (redEdge - red) / denominator : 0;
-    
-    // Threshold: NDCI > 0.2 indicates potential algae bloom (Red)
-    // NDCI <= 0.2 is transparent
-    if (ndci > 0.2) {
-        // Return red color for high NDCI (algae bloom)
-        return [1, 0, 0, 1]; // RGBA: Red, fully opaque
-    } else {
-        // Return transparent for low NDCI
-        return [0, 0, 0, 0]; // RGBA: Transparent
-    }
+
+    // Encode [-1, 1] into [0, 255], flooring so codes are bucket lower bounds
+    return [Math.floor((ndci + 1) * 127.5)];
 }
 """
 
+# NDCI > 0.2 indicates potential algae bloom (Red); the rest is transparent
+NDCI_THRESHOLD = 0.2
+# The threshold sits exactly on a code boundary (1.2 * 127.5 = 153), so
+# code >= 153 is the same test as NDCI > 0.2, except at exactly 0.2
+_NDCI_THRESHOLD_CODE = math.floor((NDCI_THRESHOLD + 1) * 127.5)
+_OVERLAY_PALETTE = (0, 0, 0, 255, 0, 0)  # index 0 transparent, index 1 Red
+
+# Only recent acquisitions are mosaicked (most recent first, cloudy scenes
+# skipped), which is far less server work than a full year of tiles
+LOOKBACK_DAYS = 14
+MAX_CLOUD_COVERAGE = 0.2
+IMAGE_SIZE = (512, 512)
+
+# Rendered tiles are cached on disk, keyed by a hash of everything that
+# determines the image. Bboxes are snapped to a 0.01 degree grid first so
+# near-identical requests share a tile.
+TILE_CACHE_DIR = Path(__file__).parent.parent / "assets" / "cache"
+BBOX_GRID_DECIMALS = 2
+# The key includes the day, so older tiles are never served again; they're
+# pruned whenever a new tile is written, along with any beyond the cap
+TILE_MAX_AGE_S = 24 * 60 * 60
+TILE_CACHE_MAX = 2048
+_EVALSCRIPT_HASH = hashlib.sha256(ALGAE_EVALSCRIPT.encode()).hexdigest()
+
 
 def fetch_satellite_image(bbox: List[float]) -> str:
     """
@@ -88,13 +98,21 @@ def fetch_satellite_image(bbox: List[float]) -> str:
         logger.warning("Invalid bbox provided, using fallback image")
         return _get_fallback_image_path()
 
-    min_x, min_y, max_x, max_y = bbox
+    min_x, min_y, max_x, max_y = (round(v, BBOX_GRID_DECIMALS) for v in bbox)
+
+    end = date.today()
+    time_interval = ((end - timedelta(days=LOOKBACK_DAYS)).isoformat(), end.isoformat())
+
+    # Serve a previously rendered tile without touching Sentinel Hub
+    output_path = _tile_cache_path((min_x, min_y, max_x, max_y), time_interval)
+    if output_path.exists():
+        return str(output_path)
 
     # Check if Sentinel Hub credentials are available
     client_id = os.getenv("SENTINEL_CLIENT_ID")
     client_secret = os.getenv("SENTINEL_CLIENT_SECRET")
 
-    if not SENTINELHUB_AVAILABLE:
+    if not _sentinelhub_available():
         logger.warning("sentinelhub-py not available, using fallback image")
         return _get_fallback_image_path()
 
@@ -102,6 +120,19 @@ def fetch_satellite_image(bbox: List[float]) -> str:
         logger.warning("Sentinel Hub credentials not configured, using fallback image")
         return _get_fallback_image_path()
 
+    # Imported here rather than at module load: sentinelhub and Pillow are
+    # only needed on a cache miss and are slow to import at server start
+    from sentinelhub import (
+        SHConfig,
+        BBox,
+        CRS,
+        DataCollection,
+        MimeType,
+        MosaickingOrder,
+        SentinelHubRequest,
+    )
+    from PIL import Image
+
     try:
         # Configure Sentinel Hub
         config = SHConfig()
@@ -117,63 +148,111 @@ def fetch_satellite_image(bbox: List[float]) -> str:
             input_data=[
                 SentinelHubRequest.input_data(
                     data_collection=DataCollection.SENTINEL2_L2A,
-                    time_interval=("2024-01-01", "2024-12-31"),  # Last year of data
+                    time_interval=time_interval,
+                    mosaicking_order=MosaickingOrder.MOST_RECENT,
+                    maxcc=MAX_CLOUD_COVERAGE,
                 )
             ],
             responses=[SentinelHubRequest.output_response("default", MimeType.PNG)],
             bbox=bbox_obj,
-            size=[512, 512],  # Image size
+            size=list(IMAGE_SIZE),  # Image size
             config=config,
         )
 
         # Download the image
         image_data = request.get_data()[0]
 
-        # Save to assets directory
-        assets_dir = Path(__file__).parent.parent / "assets"
-        assets_dir.mkdir(exist_ok=True)
-
-        output_path = assets_dir / "sentinel_heatmap.png"
-
-        # Handle image data (could be bytes or numpy array)
-        if isinstance(image_data, bytes):
-            # Direct PNG bytes
-            with open(output_path, "wb") as f:
-                f.write(image_data)
-        elif np is not None and isinstance(image_data, np.ndarray):
-            # Convert numpy array to PNG
-            if Image is not None:
-                # Normalize array values to 0-255 if needed
-                if image_data.dtype != np.uint8:
-                    # Assume values are 0-1, scale to 0-255
-                    image_data = (image_data * 255).astype(np.uint8)
-
-                # Handle RGBA format (4 channels)
-                if len(image_data.shape) == 3 and image_data.shape[2] == 4:
-                    img = Image.fromarray(image_data, "RGBA")
-                elif len(image_data.shape) == 3:
-                    img = Image.fromarray(image_data, "RGB")
-                else:
-                    img = Image.fromarray(image_data)
-
-                img.save(output_path, "PNG")
-            else:
-                # Fallback if PIL not available
-                raise ValueError("PIL/Pillow required for numpy array conversion")
+        # Handle image data (could be PNG bytes or a decoded numpy array).
+        # The PNG holds the raw NDCI band, not the overlay, so it always has
+        # to be decoded and thresholded rather than written out as is
+        if isinstance(image_data, (bytes, bytearray)):
+            logger.debug("Sentinel Hub returned PNG bytes, decoding")
+            image_data = np.asarray(Image.open(io.BytesIO(image_data)))
         else:
-            # Unknown format, try to write as-is
-            with open(output_path, "wb") as f:
-                f.write(image_data)
+            logger.debug("Sentinel Hub returned a decoded %s array", image_data.dtype)
 
-        logger.info(f"Successfully fetched satellite image: {output_path}")
+        # Threshold the NDCI band into a two-colour palette image: index 1 is
+        # Red for bloom pixels, index 0 is transparent. At 1 bit per pixel
+        # this skips building a 4-channel RGBA array and encodes far less data
+        bloom = _bloom_mask(image_data)
+        img = Image.fromarray(bloom.astype(np.uint8))
+        img.putpalette(_OVERLAY_PALETTE)
+
+        # Level 1 zlib: the mask is mostly flat color, so it still
+        # compresses well at a fraction of the default level 6 CPU
+        # Write under a temporary name and rename, so concurrent workers
+        # never serve a half-written tile from the cache
+        TILE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_suffix(f".{os.getpid()}.tmp")
+        img.save(
+            tmp_path, "PNG", compress_level=1, optimize=False, transparency=0, bits=1
+        )
+        os.replace(tmp_path, output_path)
+        _prune_tile_cache()
+
+        logger.info("Successfully fetched satellite image: %s", output_path)
         return str(output_path)
 
     except Exception as e:
-        logger.error(f"Error fetching satellite image from Sentinel Hub: {e}")
+        logger.error("Error fetching satellite image from Sentinel Hub: %s", e)
         logger.info("Falling back to demo image")
         return _get_fallback_image_path()
 
 
+@lru_cache(maxsize=None)
+def _sentinelhub_available() -> bool:
+    # Checked once per process, so a missing package doesn't cost a failed
+    # import search on every request
+    try:
+        import sentinelhub  # noqa: F401
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _tile_cache_path(bbox: tuple, time_interval: tuple) -> Path:
+    # The interval is day-granular, so a cached tile lives until the next day
+    key = hashlib.sha256(
+        repr((bbox, time_interval, MAX_CLOUD_COVERAGE, IMAGE_SIZE, _EVALSCRIPT_HASH)).encode()
+    ).hexdigest()
+    return TILE_CACHE_DIR / f"{key}.png"
+
+
+def _prune_tile_cache() -> None:
+    """
+    Deletes cached tiles (and leftover temporary files) older than
+    TILE_MAX_AGE_S, then the oldest tiles beyond TILE_CACHE_MAX.
+    """
+    now = time.time()
+    entries = []
+    for path in TILE_CACHE_DIR.iterdir():
+        try:
+            mtime = path.stat().st_mtime
+            if now - mtime > TILE_MAX_AGE_S:
+                path.unlink()
+            elif path.suffix == ".png":
+                entries.append((mtime, path))
+        except OSError:
+            # Another worker got to it first
+            continue
+
+    entries.sort()
+    for _, path in entries[:-TILE_CACHE_MAX]:
+        path.unlink(missing_ok=True)
+
+
+def _bloom_mask(tile: np.ndarray) -> np.ndarray:
+    """
+    Thresholds the evalscript's UINT8 NDCI band. Compared as integer codes:
+    decoding first would turn code 153 into 0.19999999999999996 and drop
+    pixels just above the threshold.
+    """
+    if tile.ndim == 3:
+        tile = tile[..., 0]
+    return tile >= _NDCI_THRESHOLD_CODE
+
+
 def _get_fallback_image_path() -> str:
     """
     Get the path to the fallback demo image.
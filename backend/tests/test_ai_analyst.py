@@ -0,0 +1,271 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from services import ai_analyst
+
+
+class FakeCompletions:
+    """
+    Stands in for client.chat.completions. Batch prompts get one JSON line per
+    reading (minus any ids listed in `drop`); single prompts get "single <reading>".
+    """
+
+    def __init__(self, drop=(), hang=False):
+        self.calls = []
+        self.drop = set(drop)
+        self.hang = hang
+
+    async def create(self, model, messages):
+        prompt = messages[-1]["content"]
+        self.calls.append(prompt)
+        if self.hang:
+            await asyncio.Event().wait()
+        await asyncio.sleep(0.01)
+
+        readings = re.findall(r"^(\d+)\. (.+)$", prompt, re.MULTILINE)
+        if readings:
+            lines = [
+                json.dumps({"id": int(i), "report": f"batch {reading}"})
+                for i, reading in readings
+                if int(i) not in self.drop
+            ]
+            content = "\n".join(["not json", *lines])
+        else:
+            content = f"single {prompt.splitlines()[0]}"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    def install(**kwargs):
+        completions = FakeCompletions(**kwargs)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        monkeypatch.setattr(ai_analyst, "_get_client", lambda: client)
+        return completions
+
+    ai_analyst._REPORT_CACHE.clear()
+    ai_analyst._FAILURE_CACHE.clear()
+    yield install
+    assert not ai_analyst._inflight
+    assert ai_analyst._collector is None
+
+
+def test_duplicate_requests_share_one_call(fake_llm):
+    llm = fake_llm()
+
+    async def run():
+        return await asyncio.gather(
+            *(ai_analyst.generate_situation_report(0.5, 10.0, 90.0) for _ in range(3))
+        )
+
+    results = asyncio.run(run())
+    assert len(llm.calls) == 1
+    assert results == [("single Risk=0.50 Wind=10 km/h Dir=90°", True)] * 3
+    assert ai_analyst._REPORT_CACHE[(10, 10, 9)] == results[0][0]
+
+
+def test_cancelled_caller_does_not_cancel_followers(fake_llm):
+    fake_llm()
+
+    async def run():
+        leader = asyncio.create_task(ai_analyst.generate_situation_report(0.5, 10.0, 90.0))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(ai_analyst.generate_situation_report(0.5, 10.0, 90.0))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == ("single Risk=0.50 Wind=10 km/h Dir=90°", True)
+
+
+def test_batch_fans_out_one_report_per_reading(fake_llm):
+    llm = fake_llm()
+
+    async def run():
+        ai_analyst.start_batcher()
+        try:
+            return await asyncio.gather(
+                ai_analyst.generate_situation_report(0.5, 10.0, 90.0),
+                ai_analyst.generate_situation_report(0.6, 20.0, 180.0),
+                ai_analyst.generate_situation_report(0.7, 5.0, 270.0),
+            )
+        finally:
+            await ai_analyst.stop_batcher()
+
+    results = asyncio.run(run())
+    assert len(llm.calls) == 1
+    assert results == [
+        ("batch Risk=0.50 Wind=10 km/h Dir=90°", True),
+        ("batch Risk=0.60 Wind=20 km/h Dir=180°", True),
+        ("batch Risk=0.70 Wind=5 km/h Dir=270°", True),
+    ]
+
+
+def test_batch_retries_dropped_readings_individually(fake_llm):
+    llm = fake_llm(drop={2})
+
+    async def run():
+        ai_analyst.start_batcher()
+        try:
+            return await asyncio.gather(
+                ai_analyst.generate_situation_report(0.5, 10.0, 90.0),
+                ai_analyst.generate_situation_report(0.6, 20.0, 180.0),
+            )
+        finally:
+            await ai_analyst.stop_batcher()
+
+    results = asyncio.run(run())
+    assert len(llm.calls) == 2
+    assert results == [
+        ("batch Risk=0.50 Wind=10 km/h Dir=90°", True),
+        ("single Risk=0.60 Wind=20 km/h Dir=180°", True),
+    ]
+
+
+def test_dispatch_falls_back_when_collector_dies(fake_llm, monkeypatch):
+    llm = fake_llm()
+    monkeypatch.setattr(ai_analyst, "BATCH_TIMEOUT_S", 0.05)
+
+    async def run():
+        ai_analyst.start_batcher()
+        ai_analyst._collector.cancel()
+        try:
+            return await ai_analyst.generate_situation_report(0.5, 10.0, 90.0)
+        finally:
+            await ai_analyst.stop_batcher()
+
+    assert asyncio.run(run()) == ("single Risk=0.50 Wind=10 km/h Dir=90°", True)
+    assert len(llm.calls) == 1
+
+
+def test_stop_batcher_cancels_running_batches(fake_llm):
+    llm = fake_llm(hang=True)
+
+    async def run():
+        ai_analyst.start_batcher()
+        callers = [
+            asyncio.create_task(ai_analyst.generate_situation_report(0.5, 10.0, 90.0)),
+            asyncio.create_task(ai_analyst.generate_situation_report(0.6, 20.0, 180.0)),
+        ]
+        # Let the collector close the window and start the batch
+        await asyncio.sleep(ai_analyst.BATCH_WINDOW_S * 2)
+        assert len(ai_analyst._batch_tasks) == 1
+
+        await ai_analyst.stop_batcher()
+        assert not ai_analyst._batch_tasks
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    assert len(llm.calls) == 1
+
+
+def test_system_prompt_is_long_enough_to_cache():
+    # Providers only cache prefixes of 1024+ tokens; every whitespace-separated
+    # word is at least one token, so the word count is a lower bound
+    assert len(ai_analyst._SYSTEM_PROMPT.split()) > 1024
+
+
+class FailingStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def create(self, model, messages, stream):
+        async def events():
+            for chunk in self.chunks:
+                yield SimpleNamespace(
+                    choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))]
+                )
+            raise httpx.ReadError("connection reset")
+
+        return events()
+
+
+def _collect_stream(monkeypatch, chunks):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FailingStream(chunks)))
+    monkeypatch.setattr(ai_analyst, "_get_client", lambda: client)
+
+    async def run():
+        received = []
+        try:
+            async for chunk in ai_analyst.stream_situation_report(0.5, 10.0, 90.0):
+                received.append(chunk)
+        except httpx.ReadError:
+            return received, True
+        return received, False
+
+    return asyncio.run(run())
+
+
+def test_stream_failure_mid_report_is_raised(fake_llm, monkeypatch):
+    received, failed = _collect_stream(monkeypatch, ["CRITICAL ", "toxicity"])
+    assert received == ["CRITICAL ", "toxicity"]
+    assert failed
+    assert (10, 10, 9) not in ai_analyst._REPORT_CACHE
+
+
+def test_stream_failure_before_any_chunk_falls_back(fake_llm, monkeypatch):
+    received, failed = _collect_stream(monkeypatch, [])
+    assert received == [ai_analyst._OFFLINE_TEXT]
+    assert not failed
+
+
+def test_batch_timeout_covers_a_batch_and_its_retries(monkeypatch):
+    monkeypatch.setattr(ai_analyst, "_API_KEY", "test-key")
+    monkeypatch.setattr(ai_analyst, "_client", None)
+    client = ai_analyst._get_client()
+    try:
+        call_max = client.timeout * (client.max_retries + 1)
+        assert client.max_retries == ai_analyst.LLM_MAX_RETRIES
+        assert ai_analyst.BATCH_TIMEOUT_S > 2 * call_max
+    finally:
+        asyncio.run(ai_analyst.close_client())
+
+
+@pytest.mark.parametrize(
+    "risk, wind_speed, expected",
+    [
+        (0.88, 1.0, ai_analyst._HIGH_RISK_TEMPLATES),
+        (0.8799, 1.0, None),
+        (0.1201, 38.0, None),
+        (0.12, 39.0, ai_analyst._LOW_RISK_TEMPLATES),
+        (0.10, 45.0, ai_analyst._LOW_RISK_TEMPLATES),
+        (0.10, 45.1, ai_analyst._GALE_TEMPLATES),
+        (0.10, 70.0, ai_analyst._GALE_TEMPLATES),
+    ],
+)
+def test_template_bands(risk, wind_speed, expected):
+    report = ai_analyst._template_report(risk, wind_speed, 0.0)
+    assert report == (expected[0] if expected else None)
+
+
+@pytest.mark.parametrize(
+    "wind_dir, source, drift",
+    [
+        (0.0, "northeasterly", "southwest"),
+        (89.9, "northeasterly", "southwest"),
+        (90.0, "southeasterly", "northwest"),
+        (180.0, "southwesterly", "northeast"),
+        (270.0, "northwesterly", "southeast"),
+        (359.9, "northwesterly", "southeast"),
+    ],
+)
+def test_template_headings_follow_wind_quadrant(wind_dir, source, drift):
+    high = ai_analyst._template_report(0.9, 1.0, wind_dir)
+    low = ai_analyst._template_report(0.1, 40.0, wind_dir)
+    gale = ai_analyst._template_report(0.1, 60.0, wind_dir)
+
+    # Calm-water templates only name the drift, toward the downwind side
+    assert f"creep to the {drift}" in high
+    for report in (low, gale):
+        assert source in report
+        assert f"to the {drift}" in report
+    assert "Hold all drones at base" in gale
+    assert "Fly a cautious leading-edge sweep" in low
@@ -0,0 +1,106 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import drift
+
+
+def _client(responses):
+    """
+    httpx client backed by a list of canned Open-Meteo wind readings, one per
+    request; None answers with a server error. Requests are recorded.
+    """
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        wind = responses.pop(0)
+        if wind is None:
+            return httpx.Response(500)
+        return httpx.Response(
+            200, json={"current": {"wind_speed_10m": wind[0], "wind_direction_10m": wind[1]}}
+        )
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), requests
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    drift._wind_cache.clear()
+    drift._prefetched.clear()
+    yield
+    drift._wind_cache.clear()
+    drift._prefetched.clear()
+
+
+def test_failed_fetch_is_not_cached():
+    async def run():
+        client, requests = _client([None, (12.0, 200.0)])
+        first = await drift.get_wind_data(41.85, -83.1, client)
+        second = await drift.get_wind_data(41.85, -83.1, client)
+        return first, second, len(requests)
+
+    assert asyncio.run(run()) == (None, (12.0, 200.0), 2)
+
+
+def test_stale_entry_is_served_while_refreshing():
+    async def run():
+        client, requests = _client([(12.0, 200.0), (20.0, 90.0)])
+        await drift.get_wind_data(41.85, -83.1, client)
+
+        # Age the entry past its TTL but within the stale window
+        key = (41.9, -83.1)
+        fetched_at, wind = drift._wind_cache[key]
+        drift._wind_cache[key] = (fetched_at - drift.WIND_TTL_S - 1, wind)
+
+        stale = await drift.get_wind_data(41.85, -83.1, client)
+        await asyncio.gather(*drift._refresh_tasks)
+        fresh = await drift.get_wind_data(41.85, -83.1, client)
+        return stale, fresh, len(requests)
+
+    assert asyncio.run(run()) == ((12.0, 200.0), (20.0, 90.0), 2)
+
+
+def test_prefetched_cells_are_bounded_by_the_cache(monkeypatch):
+    monkeypatch.setattr(drift, "WIND_CACHE_MAX", 2)
+
+    async def run():
+        client, _ = _client([None, (10.0, 0.0), (10.0, 0.0), (10.0, 0.0)])
+        # A failed prefetch is never marked
+        drift._prefetch_wind(41.0, -83.0, 42.0, -83.0, client)
+        await asyncio.gather(*drift._refresh_tasks)
+        assert not drift._prefetched
+
+        # Evicting a prefetched cell drops its mark too
+        drift._prefetch_wind(41.0, -83.0, 43.0, -83.0, client)
+        await asyncio.gather(*drift._refresh_tasks)
+        assert drift._prefetched == {(43.0, -83.0)}
+        drift._store_wind((44.0, -83.0), (1.0, 0.0))
+        drift._store_wind((45.0, -83.0), (1.0, 0.0))
+        assert not drift._prefetched
+
+    asyncio.run(run())
+
+
+def test_invalid_point_does_not_fail_its_batch():
+    requests = []
+
+    def handler(request):
+        # Like Open-Meteo: one out-of-range coordinate fails the whole request
+        requests.append(request)
+        lats = [float(v) for v in request.url.params["latitude"].split(",")]
+        if any(abs(lat) > 90 for lat in lats):
+            return httpx.Response(400, json={"error": True, "reason": "Latitude must be in range"})
+        current = {"wind_speed_10m": 12.0, "wind_direction_10m": 200.0}
+        return httpx.Response(200, json=[{"current": current} for _ in lats])
+
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return await drift.get_wind_data_batch(
+            [41.85, 42.5, 100.0, float("nan")], [-83.1, -81.0, 0.0, 0.0], client
+        )
+
+    winds = asyncio.run(run())
+    assert winds == [(12.0, 200.0), (12.0, 200.0), (0.0, 0.0), (0.0, 0.0)]
+    assert len(requests) == 1
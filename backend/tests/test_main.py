@@ -0,0 +1,29 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_analyze_batch_rejects_too_many_points(client):
+    points = [[41.85, -83.1]] * (main.BATCH_POINTS_MAX + 1)
+    response = client.post("/api/analyze_batch", json={"points": points})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize(
+    "point", ["[NaN, -83.1]", "[41.85, Infinity]", "[100, 0]", "[-90.5, 0]", "[0, 180.5]"]
+)
+def test_analyze_batch_rejects_invalid_coordinates(client, point):
+    response = client.post(
+        "/api/analyze_batch",
+        content=f'{{"points": [[41.85, -83.1], {point}]}}',
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+    assert "must be finite" in response.json()["detail"]
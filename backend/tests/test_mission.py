@@ -0,0 +1,65 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from services import mission
+
+
+def _reference_flight_path(algae_lat, algae_lon, drift_lat, drift_lon):
+    # The original per-step loop using atan2 for the drift bearing
+    path = [
+        [mission.PORT_STANLEY_LAT, mission.PORT_STANLEY_LON],
+        [algae_lat, algae_lon],
+    ]
+    steps = 8
+    dlat = drift_lat - algae_lat
+    dlon = drift_lon - algae_lon
+    drift_bearing = math.atan2(dlon * math.cos(math.radians(algae_lat)), dlat)
+    perp_bearing = drift_bearing + (math.pi / 2)
+    width_degrees = 1.5 / 111.0
+    for i in range(1, steps + 1):
+        center_lat = algae_lat + (dlat / steps * i)
+        center_lon = algae_lon + (dlon / steps * i)
+        perp_lat_offset = width_degrees * math.cos(perp_bearing)
+        perp_lon_offset = (
+            width_degrees * math.sin(perp_bearing) / math.cos(math.radians(center_lat))
+        )
+        path.append([center_lat + perp_lat_offset, center_lon + perp_lon_offset])
+        path.append([center_lat - perp_lat_offset, center_lon - perp_lon_offset])
+    return path
+
+
+def _assert_matches_reference(*args):
+    expected = np.array(_reference_flight_path(*args))
+    actual = np.array(mission.generate_flight_path(*args))
+    assert actual.shape == expected.shape == (18, 2)
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        (41.85, -83.1, 41.85, -83.1),  # no drift: bearing defaults to north
+        (41.85, -83.1, 41.9, -83.1),  # due north
+        (41.85, -83.1, 41.8, -83.1),  # due south
+        (41.85, -83.1, 41.85, -83.0),  # due east
+        (41.85, -83.1, 41.85, -83.2),  # due west
+        (85.0, 10.0, 85.02, 10.3),  # high latitude
+        (-85.0, 10.0, -85.02, 9.7),
+        (89.0, 0.0, 89.0, 0.0),  # high latitude, no drift
+    ],
+)
+def test_flight_path_matches_atan2_reference(args):
+    _assert_matches_reference(*args)
+
+
+def test_flight_path_matches_atan2_reference_randomized():
+    rng = random.Random(1234)
+    for _ in range(2000):
+        lat = rng.uniform(-85.0, 85.0)
+        lon = rng.uniform(-179.0, 179.0)
+        _assert_matches_reference(
+            lat, lon, lat + rng.uniform(-0.1, 0.1), lon + rng.uniform(-0.1, 0.1)
+        )
@@ -0,0 +1,49 @@
+import os
+import time
+
+import numpy as np
+
+from services import sentinel
+
+
+def test_prune_drops_expired_and_excess_tiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(sentinel, "TILE_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(sentinel, "TILE_CACHE_MAX", 3)
+
+    now = time.time()
+    ages = {f"{i}.png": i * 10 for i in range(5)}
+    ages["yesterday.png"] = sentinel.TILE_MAX_AGE_S + 60
+    ages["crashed.123.tmp"] = sentinel.TILE_MAX_AGE_S + 60
+    for name, age in ages.items():
+        path = tmp_path / name
+        path.write_bytes(b"")
+        os.utime(path, (now - age, now - age))
+
+    sentinel._prune_tile_cache()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["0.png", "1.png", "2.png"]
+
+
+def _encode(ndci):
+    # Same arithmetic as ALGAE_EVALSCRIPT (JS numbers are float64)
+    return np.floor((np.asarray(ndci, dtype=np.float64) + 1) * 127.5).astype(np.uint8)
+
+
+def test_evalscript_floors_the_encoding():
+    assert "Math.floor((ndci + 1) * 127.5)" in sentinel.ALGAE_EVALSCRIPT
+
+
+def test_bloom_mask_matches_ndci_threshold():
+    ndci = np.array([-1.0, 0.0, 0.19, 0.1999, 0.2001, 0.201, 0.2035, 0.21, 0.5, 1.0])
+    expected = ndci > sentinel.NDCI_THRESHOLD
+    assert (sentinel._bloom_mask(_encode(ndci)) == expected).all()
+
+    # Dense sweep around the threshold
+    ndci = np.linspace(0.15, 0.25, 10001)
+    ndci = ndci[ndci != sentinel.NDCI_THRESHOLD]
+    assert (sentinel._bloom_mask(_encode(ndci)) == (ndci > 0.2)).all()
+
+
+def test_bloom_mask_reads_first_band_of_decoded_png():
+    tile = np.stack([_encode([[0.1, 0.3]]), np.full((1, 2), 255, np.uint8)], axis=-1)
+    assert sentinel._bloom_mask(tile).tolist() == [[False, True]]